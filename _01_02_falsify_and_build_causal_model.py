@@ -0,0 +1,337 @@
+"""
+Default script template for the Python Meta Action Agent.
+
+When importing packages, follow the format below to add a comment at the end of declaration 
+and specify a version or a package name when the import name is different from expected python package.
+This allows the agent to install the correct package version during configuration:
+e.g. import paho.mqtt as np  # version=2.1.0 package=paho-mqtt
+
+This script provides a structure for implementing on_create, on_receive, and on_destroy functions.
+It includes a basic example using 'foo' and 'bar' concepts to demonstrate functionality.
+Each function should return a dictionary object with result data, or None if no result is needed.
+"""
+
+def on_create(data: dict) -> dict | None:
+    return None
+
+# Install Libraries
+import networkx as nx
+import pandas as pd
+import numpy as np
+from dowhy import gcm
+import pickle
+import joblib
+import ast
+import os
+import time
+from dowhy.gcm.falsify import falsify_graph
+import orjson
+from functools import lru_cache
+import hashlib
+import textwrap
+
+# Disable DoWhy progress bars; they write to stderr synchronously on every call
+gcm.config.disable_progress_bars()
+
+def _to_column(values: list):
+    """
+    Convert one column of values, typing float columns up front as float64 so pandas
+    skips its per-value dtype inference; other columns are left for pandas to infer.
+    """
+    if values and type(values[0]) is float:
+        try:
+            return np.array(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            pass
+    return values
+
+def _records_to_frame(observation) -> pd.DataFrame:
+    """
+    Build a DataFrame from a list of row dictionaries (or a dict of columns).
+    """
+    if isinstance(observation, list) and observation and isinstance(observation[0], dict):
+        # Build column-major arrays once (columns from the first row) instead of
+        # letting pandas walk a row-oriented object array; rows with differing keys are
+        # left to pandas, which fills the missing values with NaN
+        columns = observation[0].keys()
+        if all(isinstance(row, dict) and row.keys() == columns for row in observation):
+            return pd.DataFrame({column: _to_column([row[column] for row in observation]) for column in columns}, copy=False)
+    return pd.DataFrame(observation)
+
+@lru_cache(maxsize=4)
+def _parse_observation_json(raw_observation: str) -> pd.DataFrame:
+    """
+    Deserialize a JSON observation payload, caching the resulting DataFrame per payload so
+    repeated calls with the same telemetry skip the JSON parse and frame construction.
+
+    Observation payloads are treated as immutable: the cached frame is shared between calls
+    and must not be modified in place.
+    """
+    return _records_to_frame(orjson.loads(raw_observation))
+
+def _read_observation(observation) -> pd.DataFrame:
+    """
+    Convert the incoming observation into a pandas DataFrame.
+
+    A DataFrame (e.g. loaded locally with pd.read_csv) is used as-is, so the
+    CSV -> list[dict] -> DataFrame round-trip is skipped entirely.
+    """
+    # Option 1: If the data is already a DataFrame
+    if isinstance(observation, pd.DataFrame):
+        return observation
+    # Option 2: If the data is a JSON string that needs to be deserialized
+    if isinstance(observation, str):
+        return _parse_observation_json(observation)  # In Meta Agent
+    # Option 3: If the data is already a list of row dictionaries
+    return _records_to_frame(observation)  # In Local
+
+def _read_observation_file(observation_path: str) -> pd.DataFrame:
+    """
+    Read the observation straight from a file into a typed DataFrame, avoiding the
+    intermediate list of row dictionaries. Parquet files (columnar, compressed,
+    requires pyarrow) are preferred; CSV is kept as the legacy format and read with the C parser.
+    """
+    if observation_path.lower().endswith(".parquet"):
+        return pd.read_parquet(observation_path)
+    return pd.read_csv(observation_path, engine="c", low_memory=False)
+
+@lru_cache(maxsize=32)
+def _parse_causal_relationships(causal_relationships: str) -> tuple:
+    """
+    Parse the string-formatted edge list, caching the result per distinct string.
+    JSON arrays (e.g. '[["A", "B"]]') are the preferred wire format and are decoded
+    with orjson; the Python tuple notation falls back to ast.literal_eval.
+    """
+    causal_relationships = causal_relationships.strip()
+    try:
+        edges = orjson.loads(causal_relationships)
+    except orjson.JSONDecodeError:
+        edges = ast.literal_eval(causal_relationships)
+    return tuple(tuple(edge) for edge in edges)
+
+def _read_causal_relationships(causal_relationships) -> tuple:
+    """
+    Return the causal graph edges as a hashable tuple of pairs, taking a native
+    list/tuple of pairs directly and parsing (with caching) the legacy string format otherwise.
+    """
+    if isinstance(causal_relationships, (list, tuple)):
+        return tuple(tuple(edge) for edge in causal_relationships)
+    return _parse_causal_relationships(causal_relationships)
+
+@lru_cache(maxsize=32)
+def _build_causal_graph(edges: tuple) -> nx.DiGraph:
+    """
+    Build the causal graph once per distinct edge list. The graph is frozen because
+    it is shared between calls; callers that need to modify it must copy it first.
+    """
+    return nx.freeze(nx.DiGraph(edges))
+
+# Unfitted mechanisms picked by auto-assignment, keyed by (edges, model type, quality, data fingerprint)
+_MECHANISM_ASSIGNMENTS: dict = {}
+_MAX_MECHANISM_ASSIGNMENTS = 8
+
+def _observation_fingerprint(observation: pd.DataFrame) -> str:
+    """
+    Content hash of the observation (column names and values, ignoring the index).
+    """
+    digest = hashlib.sha1(repr(tuple(observation.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(observation, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def _assign_causal_mechanisms(causal_model, observation: pd.DataFrame, assignment_quality, assignment: dict | None) -> dict:
+    """
+    Auto-assign causal mechanisms, or replay a previous assignment as fresh unfitted clones,
+    which skips the per-node model-selection search. Returns the assignment as unfitted clones.
+
+    The build runs in a worker process, so the assignment is handed in and returned and the
+    cache (_MECHANISM_ASSIGNMENTS) is kept by on_receive in the calling process.
+    """
+    if assignment is None:
+        gcm.auto.assign_causal_mechanisms(causal_model, observation, quality=assignment_quality)
+        return {node: causal_model.causal_mechanism(node).clone() for node in causal_model.graph.nodes}
+    for node, mechanism in assignment.items():
+        causal_model.set_causal_mechanism(node, mechanism.clone())
+    return assignment
+
+# Human-readable interpretation of each (falsifiable, falsified) outcome, dedented once at import
+_EXPLANATIONS = {
+    (False, False): textwrap.dedent("""
+        Your causal graph is too vague to test properly. Add more specific causal relationships to create a model that makes more concrete predictions.
+        """),
+    (True, False): textwrap.dedent("""
+        Great! Your causal graph is both meaningful and supported by data. Proceed with confidence using this model for further analysis.
+        """),
+    (False, True): textwrap.dedent("""
+        Unexpected error in testing procedure. Review your methodology and code implementation, as this result combination shouldn't occur.
+        """),
+    (True, True): textwrap.dedent("""
+        Your causal model is incorrect. Revise your graph structure by examining which specific 
+        conditional independence assumptions failed and adjust the causal relationships accordingly.
+        """),
+}
+
+def _falsify(causal_graph: nx.DiGraph, observation: pd.DataFrame, n_permutations: int | None, n_jobs: int) -> tuple:
+    """
+    Falsify the causal graph against the observation, returning (falsifiable, falsified, explanation).
+    Runs in its own worker process, seeded as in _01_falsify_graph, so the outcome matches running that script.
+    """
+    # DoWhy re-seeds the global random state inside each of its parallel tasks, so nested tasks run in
+    # processes (loky) rather than the threads joblib uses inside a worker by default, which would share it
+    with joblib.parallel_config(backend="loky"):
+        gcm.util.general.set_random_seed(0)
+        result = falsify_graph(causal_graph, data=observation, show_progress_bar=False, n_permutations=n_permutations, n_jobs=n_jobs)
+    return result.falsifiable, result.falsified, _EXPLANATIONS.get((result.falsifiable, result.falsified), "")
+
+def _build(causal_relationship: tuple, observation: pd.DataFrame, causal_model_type: str, assignment_quality,
+           model_save_path: str, compress=None, assignment: dict | None = None) -> tuple:
+    """
+    Assign and fit the causal mechanisms and save the fitted model, returning (saved path, assignment).
+    Runs in its own worker process, seeded as in _02_build_causal_model, so the saved model matches
+    the one that script builds.
+    """
+    # Nested tasks (the model-selection search) run in processes for the same reason as in _falsify
+    with joblib.parallel_config(backend="loky"):
+        gcm.util.general.set_random_seed(0)
+        # The structural causal model stores its mechanisms on the graph nodes, so it gets its own copy
+        causal_graph = nx.DiGraph(_build_causal_graph(causal_relationship))
+        if causal_model_type == "non-invertible":
+            causal_model = gcm.StructuralCausalModel(causal_graph)
+        elif causal_model_type == "invertible":
+            causal_model = gcm.InvertibleStructuralCausalModel(causal_graph)
+
+        assignment = _assign_causal_mechanisms(causal_model, observation, assignment_quality, assignment)
+        # Re-seed so the fit does not depend on whether the assignment search ran or was replayed
+        gcm.util.general.set_random_seed(0)
+        gcm.fit(causal_model, observation)
+
+    # Protocol 5 serializes the fitted models' numpy arrays as raw buffers (smaller, faster to load)
+    # in both the plain pickle and the optional joblib-compressed file
+    if compress:
+        # Compressed file (e.g. ["lz4", 3]); the fitted models' numpy arrays compress well
+        joblib.dump(causal_model, model_save_path, compress=tuple(compress) if isinstance(compress, list) else compress, protocol=pickle.HIGHEST_PROTOCOL)
+    else:
+        with open(model_save_path, 'wb') as file:
+            pickle.dump(causal_model, file, protocol=pickle.HIGHEST_PROTOCOL)
+    return model_save_path, assignment
+
+def on_receive(data: dict) -> dict:
+    """
+    Falsify a causal graph and build (assign, fit and save) its causal model in one call.
+
+    This combines _01_falsify_graph and _02_build_causal_model for callers that run both on the
+    same observation and graph: the observation and the edge list are parsed once, and the
+    falsification and the model build run concurrently in two worker processes. Both draw from
+    NumPy's global random state, so each gets its own process and is seeded as in its own script;
+    the results therefore match running the two scripts in sequence. The model is built
+    regardless of the falsification outcome.
+
+    Args:
+        data (dict): A dictionary containing:
+        - observation (str | list[dict] | pd.DataFrame): Telemetry data from the CSV file
+        - observation_path (str, optional): Path to a Parquet or CSV file, read directly instead of "observation"
+        - observation_dtypes (dict, optional): Mapping of column name to dtype applied after loading
+        - causal_relationships (str | list[tuple]): String representation of causal graph edges
+          (JSON arrays such as '[["A", "B"]]' preferred), or a native list of (source, target) tuples
+        - categorical_columns (list[str], optional): Columns to convert to the pandas category dtype for the build
+        - downcast_float32 (bool, optional): Fit on float32 copies of the float64 columns (default False)
+        - n_permutations (int, optional): Number of random graph permutations to falsify against (default DoWhy's)
+        - n_jobs (int, optional): Number of parallel workers for the independence tests (default -1, all cores)
+        - causal_model_type (str): Model type, either "invertible" or "non-invertible"
+        - model_path (str): Directory path where the trained model should be saved
+        - model_name (str, optional): Name of the model to be saved (default "invertible_causal_model")
+        - compress (str | int | list, optional): joblib compression for the saved model, e.g. ["lz4", 3]
+          ("lz4" requires the lz4 package) or 3 for zlib level 3; default None saves an uncompressed pickle
+        - quality (str, optional): Auto-assignment quality, "GOOD" (default, fastest), "BETTER" or "BEST"
+
+    Returns:
+        dict: Result dictionary containing:
+        - timestamp (str): Timestamp when the request was received
+        - status (str): "success" or "error"
+        - message (str): Description of the outcome
+        - causal_relationships: The input causal relationships
+        - falsifiable (bool): Whether the causal graph makes testable predictions, or None if error
+        - falsified (bool): Whether the testable predictions contradict the data, or None if error
+        - explanation (str): Human-readable interpretation of the falsifiability result, or None if error
+        - causal_model_type (str): Model type used (echoed from input)
+        - saved_path (str): Path where model was saved, or None if error
+    """
+    # Capture timestamp once, shared by the success and error results
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")  # e.g., '2025-04-14 14:25:00'
+
+    try:
+        # Retrieve input parameters from the data dictionary
+        causal_model_type = data.get("causal_model_type")
+
+        # --- Step 0: Read the test dataset into a pandas DataFrame (once, for both tasks)
+        if data.get('observation_path'):
+            observation = _read_observation_file(data['observation_path'])
+        else:
+            observation = _read_observation(data['observation'])
+        # Optional caller-supplied schema, e.g. {"engine_rpm": "float64"}, to skip dtype inference downstream
+        if data.get('observation_dtypes'):
+            observation = observation.astype(data['observation_dtypes'], copy=False)
+
+        # --- Step 1: Define Causal Graph ---
+        causal_relationship = _read_causal_relationships(data["causal_relationships"])
+        assignment_quality = gcm.auto.AssignmentQuality[data.get("quality", "GOOD").upper()]
+        model_name = data.get("model_name", "invertible_causal_model")
+        model_save_path = os.path.join(data["model_path"], f'{model_name}.pkl')
+
+        # The build uses the same column conversions as _02_build_causal_model; the falsification
+        # sees the observation as _01_falsify_graph does
+        build_observation = observation
+        # Known discrete columns as pandas categoricals, so their categories are stored once instead of per row
+        if data.get('categorical_columns'):
+            build_observation = build_observation.astype({column: 'category' for column in data['categorical_columns']}, copy=False)
+        # Optionally downcast float64 columns to float32, halving memory traffic in the regressors
+        if data.get('downcast_float32', False):
+            float_columns = build_observation.select_dtypes('float64').columns
+            build_observation = build_observation.astype({column: 'float32' for column in float_columns}, copy=False)
+        # Mechanism assignments are cached here, in the calling process, and handed to the build
+        cache_key = (causal_relationship, causal_model_type, assignment_quality, _observation_fingerprint(build_observation))
+
+        # --- Step 2: Falsify the graph and build the causal model concurrently, in two worker processes
+        # falsify_graph copies the graph before modifying it, so the shared frozen graph can be used as-is
+        with joblib.Parallel(n_jobs=2, backend="loky") as parallel:
+            (falsifiable, falsified, explanation), (saved_path, assignment) = parallel([
+                joblib.delayed(_falsify)(_build_causal_graph(causal_relationship), observation,
+                                         data.get("n_permutations"), data.get("n_jobs", -1)),
+                joblib.delayed(_build)(causal_relationship, build_observation, causal_model_type, assignment_quality,
+                                       model_save_path, data.get("compress"), _MECHANISM_ASSIGNMENTS.get(cache_key))
+            ])
+        if cache_key not in _MECHANISM_ASSIGNMENTS:
+            if len(_MECHANISM_ASSIGNMENTS) >= _MAX_MECHANISM_ASSIGNMENTS:
+                # Evict the oldest entry
+                _MECHANISM_ASSIGNMENTS.pop(next(iter(_MECHANISM_ASSIGNMENTS)))
+            _MECHANISM_ASSIGNMENTS[cache_key] = assignment
+
+        result = {
+            "timestamp": timestamp,
+            "status": "success",
+            "message": "Assessment Completed. Model saved successfully.",
+            "causal_relationships": data.get("causal_relationships"),
+            "falsifiable": falsifiable,
+            "falsified": falsified,
+            "explanation": explanation,
+            "causal_model_type": data.get("causal_model_type"),
+            "saved_path": saved_path
+        }
+
+    except Exception as e:
+        # If there is any exception
+        result = {
+            "timestamp": timestamp,
+            "status": "error",
+            "message": str(e),
+            "causal_relationships": data.get("causal_relationships"),
+            "falsifiable": None,
+            "falsified": None,
+            "explanation": None,
+            "causal_model_type": data.get("causal_model_type"),
+            "saved_path": None
+        }
+
+    return result
+
+def on_destroy() -> dict | None:
+    return None
\ No newline at end of file
@@ -17,11 +17,124 @@ def on_create(data: dict) -> dict | None:
 # Install Libraries
 import networkx as nx
 import pandas as pd
+import numpy as np
 from dowhy import gcm
 import ast
-from datetime import datetime
+import time
 from dowhy.gcm.falsify import falsify_graph
-import json
+import orjson
+from functools import lru_cache
+import textwrap
+
+def _to_column(values: list):
+    """
+    Convert one column of values, typing float columns up front as float64 so pandas
+    skips its per-value dtype inference; other columns are left for pandas to infer.
+    """
+    if values and type(values[0]) is float:
+        try:
+            return np.array(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            pass
+    return values
+
+def _records_to_frame(observation) -> pd.DataFrame:
+    """
+    Build a DataFrame from a list of row dictionaries (or a dict of columns).
+    """
+    if isinstance(observation, list) and observation and isinstance(observation[0], dict):
+        # Build column-major arrays once (columns from the first row) instead of
+        # letting pandas walk a row-oriented object array; rows with differing keys are
+        # left to pandas, which fills the missing values with NaN
+        columns = observation[0].keys()
+        if all(isinstance(row, dict) and row.keys() == columns for row in observation):
+            return pd.DataFrame({column: _to_column([row[column] for row in observation]) for column in columns}, copy=False)
+    return pd.DataFrame(observation)
+
+@lru_cache(maxsize=4)
+def _parse_observation_json(raw_observation: str) -> pd.DataFrame:
+    """
+    Deserialize a JSON observation payload, caching the resulting DataFrame per payload so
+    repeated calls with the same telemetry skip the JSON parse and frame construction.
+
+    Observation payloads are treated as immutable: the cached frame is shared between calls
+    and must not be modified in place.
+    """
+    return _records_to_frame(orjson.loads(raw_observation))
+
+def _read_observation(observation) -> pd.DataFrame:
+    """
+    Convert the incoming observation into a pandas DataFrame.
+
+    A DataFrame (e.g. loaded locally with pd.read_csv) is used as-is, so the
+    CSV -> list[dict] -> DataFrame round-trip is skipped entirely.
+    """
+    # Option 1: If the data is already a DataFrame
+    if isinstance(observation, pd.DataFrame):
+        return observation
+    # Option 2: If the data is a JSON string that needs to be deserialized
+    if isinstance(observation, str):
+        return _parse_observation_json(observation)  # In Meta Agent
+    # Option 3: If the data is already a list of row dictionaries
+    return _records_to_frame(observation)  # In Local
+
+def _read_observation_file(observation_path: str) -> pd.DataFrame:
+    """
+    Read the observation straight from a file into a typed DataFrame, avoiding the
+    intermediate list of row dictionaries. Parquet files (columnar, compressed,
+    requires pyarrow) are preferred; CSV is kept as the legacy format and read with the C parser.
+    """
+    if observation_path.lower().endswith(".parquet"):
+        return pd.read_parquet(observation_path)
+    return pd.read_csv(observation_path, engine="c", low_memory=False)
+
+@lru_cache(maxsize=32)
+def _parse_causal_relationships(causal_relationships: str) -> tuple:
+    """
+    Parse the string-formatted edge list, caching the result per distinct string.
+    JSON arrays (e.g. '[["A", "B"]]') are the preferred wire format and are decoded
+    with orjson; the Python tuple notation falls back to ast.literal_eval.
+    """
+    causal_relationships = causal_relationships.strip()
+    try:
+        edges = orjson.loads(causal_relationships)
+    except orjson.JSONDecodeError:
+        edges = ast.literal_eval(causal_relationships)
+    return tuple(tuple(edge) for edge in edges)
+
+def _read_causal_relationships(causal_relationships) -> tuple:
+    """
+    Return the causal graph edges as a hashable tuple of pairs, taking a native
+    list/tuple of pairs directly and parsing (with caching) the legacy string format otherwise.
+    """
+    if isinstance(causal_relationships, (list, tuple)):
+        return tuple(tuple(edge) for edge in causal_relationships)
+    return _parse_causal_relationships(causal_relationships)
+
+@lru_cache(maxsize=32)
+def _build_causal_graph(edges: tuple) -> nx.DiGraph:
+    """
+    Build the causal graph once per distinct edge list. The graph is frozen because
+    it is shared between calls; callers that need to modify it must copy it first.
+    """
+    return nx.freeze(nx.DiGraph(edges))
+
+# Human-readable interpretation of each (falsifiable, falsified) outcome, dedented once at import
+_EXPLANATIONS = {
+    (False, False): textwrap.dedent("""
+        Your causal graph is too vague to test properly. Add more specific causal relationships to create a model that makes more concrete predictions.
+        """),
+    (True, False): textwrap.dedent("""
+        Great! Your causal graph is both meaningful and supported by data. Proceed with confidence using this model for further analysis.
+        """),
+    (False, True): textwrap.dedent("""
+        Unexpected error in testing procedure. Review your methodology and code implementation, as this result combination shouldn't occur.
+        """),
+    (True, True): textwrap.dedent("""
+        Your causal model is incorrect. Revise your graph structure by examining which specific 
+        conditional independence assumptions failed and adjust the causal relationships accordingly.
+        """),
+}
 
 def on_receive(data: dict) -> dict:
     """
@@ -37,14 +150,23 @@ def on_receive(data: dict) -> dict:
         A dictionary with the following required keys:
         - "observation": A list of dictionaries (typically converted from a CSV file) representing 
           tabular observational data, where each dictionary is a row with column names as keys.
+          A pandas DataFrame (e.g. from pd.read_csv) is also accepted and used without conversion.
+        - "observation_path" (optional): Path to a Parquet or CSV file; when given it is read directly and
+          "observation" is ignored.
+        - "observation_dtypes" (optional): Mapping of column name to dtype applied after loading.
         - "causal_relationships": A string representing a Python list of tuple pairs, 
           each defining a directed edge in the causal graph (e.g., "('A', 'B')").
+          A JSON array of pairs (e.g. '[["A", "B"]]') is parsed faster, and a native list of
+          (source, target) tuples is also accepted and skips parsing.
+        - "n_permutations" (optional): Number of random graph permutations to test against
+          (default None, i.e. DoWhy's default of 20 at the 0.05 significance level).
+        - "n_jobs" (optional): Number of parallel workers for the independence tests (default -1, all cores).
 
     Returns:
     --------
     dict
         A dictionary containing:
-        - "timestamp": The time the function was executed.
+        - "timestamp": The time the request was received (before the tests run).
         - "status": "success" if the test ran without error, "error" otherwise.
         - "message": Status description or error message.
         - "causal_relationships": The input causal relationships.
@@ -63,54 +185,43 @@ def on_receive(data: dict) -> dict:
     Example:
     --------
     >>> data = {
-    ...     "observation": csv_to_dict("cat797f_egt_causal_data.csv"),
-    ...     "causal_relationships": "[('engine_load', 'fuel_consumption'), ('fuel_consumption', 'egt_turbo_inlet')]"
+    ...     "observation": pd.read_csv("cat797f_egt_causal_data.csv", engine="c", low_memory=False),
+    ...     "causal_relationships": [('engine_load', 'fuel_consumption'), ('fuel_consumption', 'egt_turbo_inlet')]
     ... }
     >>> result = on_receive(data)
     >>> print(result["falsifiable"], result["falsified"])
     """
+    # Capture timestamp once, shared by the success and error results
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")  # e.g., '2025-04-14 14:25:00'
+
     # Set a fixed random seed for reproducibility
     gcm.util.general.set_random_seed(0)
     try:
         # --- Step 0: Read the test dataset into a pandas DataFrame
-        # Option 1: If the data is a JSON string that needs to be deserialized
-        if isinstance(data['observation'], str):
-            deserialized_data = json.loads(data['observation'])  # In Meta Agent
-        # Option 2: If the data is already a dictionary
+        if data.get('observation_path'):
+            observation = _read_observation_file(data['observation_path'])
         else:
-            deserialized_data = data['observation']  # In Local
-        observation = pd.DataFrame(deserialized_data)
+            observation = _read_observation(data['observation'])
+        # Optional caller-supplied schema, e.g. {"engine_rpm": "float64"}, to skip dtype inference downstream
+        if data.get('observation_dtypes'):
+            observation = observation.astype(data['observation_dtypes'], copy=False)
 
         # --- Step 1: Define Causal Model ---
         # Create a directed graph representing the causal relationships
-        causal_graph = nx.DiGraph(ast.literal_eval(data["causal_relationships"].strip()))
+        # falsify_graph copies the graph before modifying it, so the shared frozen graph can be used as-is
+        causal_graph = _build_causal_graph(_read_causal_relationships(data["causal_relationships"]))
 
         # --- Step 2: Refute the Causal Graph
-        result = falsify_graph(causal_graph, data=observation, show_progress_bar=False)
-
-        explanation=""
-        if result.falsifiable==False and result.falsified==False:
-            explanation = """
-            Your causal graph is too vague to test properly. Add more specific causal relationships to create a model that makes more concrete predictions.
-            """
-        elif result.falsifiable==True and result.falsified==False:
-            explanation = """
-            Great! Your causal graph is both meaningful and supported by data. Proceed with confidence using this model for further analysis.
-            """
-        elif result.falsifiable==False and result.falsified==True:
-            explanation = """
-            Unexpected error in testing procedure. Review your methodology and code implementation, as this result combination shouldn't occur.
-            """
-        elif result.falsifiable==True and result.falsified==True:
-            explanation = """
-            Your causal model is incorrect. Revise your graph structure by examining which specific 
-            conditional independence assumptions failed and adjust the causal relationships accordingly.
-            """
-
-        # If all above steps are successful
-        # Add this before creating the result dictionary
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # e.g., '2025-04-14 14:25:00'
-        
+        # The independence tests are spread over n_jobs workers (all cores by default); fewer
+        # permutations trade test power for latency (None keeps DoWhy's default of 1 / significance level)
+        result = falsify_graph(causal_graph,
+                               data=observation,
+                               show_progress_bar=False,
+                               n_permutations=data.get("n_permutations"),
+                               n_jobs=data.get("n_jobs", -1))
+
+        explanation = _EXPLANATIONS.get((result.falsifiable, result.falsified), "")
+
         result = {
             "timestamp": timestamp,
             "status": "success",
@@ -123,9 +234,6 @@ def on_receive(data: dict) -> dict:
 
     except Exception as e:
         # If there is any exception
-        # Add this before creating the result dictionary
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # e.g., '2025-04-14 14:25:00'
-
         result = {
             "timestamp": timestamp,
             "status": "error",
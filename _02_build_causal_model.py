@@ -17,12 +17,141 @@ def on_create(data: dict) -> dict | None:
 # Install Libraries
 import networkx as nx
 import pandas as pd
+import numpy as np
 from dowhy import gcm
 import pickle
+import joblib
 import ast
 import os
-from datetime import datetime
-import json
+import time
+import orjson
+from functools import lru_cache
+import hashlib
+
+# Disable DoWhy progress bars; they write to stderr synchronously on every call
+gcm.config.disable_progress_bars()
+
+def _to_column(values: list):
+    """
+    Convert one column of values, typing float columns up front as float64 so pandas
+    skips its per-value dtype inference; other columns are left for pandas to infer.
+    """
+    if values and type(values[0]) is float:
+        try:
+            return np.array(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            pass
+    return values
+
+def _records_to_frame(observation) -> pd.DataFrame:
+    """
+    Build a DataFrame from a list of row dictionaries (or a dict of columns).
+    """
+    if isinstance(observation, list) and observation and isinstance(observation[0], dict):
+        # Build column-major arrays once (columns from the first row) instead of
+        # letting pandas walk a row-oriented object array; rows with differing keys are
+        # left to pandas, which fills the missing values with NaN
+        columns = observation[0].keys()
+        if all(isinstance(row, dict) and row.keys() == columns for row in observation):
+            return pd.DataFrame({column: _to_column([row[column] for row in observation]) for column in columns}, copy=False)
+    return pd.DataFrame(observation)
+
+@lru_cache(maxsize=4)
+def _parse_observation_json(raw_observation: str) -> pd.DataFrame:
+    """
+    Deserialize a JSON observation payload, caching the resulting DataFrame per payload so
+    repeated calls with the same telemetry skip the JSON parse and frame construction.
+
+    Observation payloads are treated as immutable: the cached frame is shared between calls
+    and must not be modified in place.
+    """
+    return _records_to_frame(orjson.loads(raw_observation))
+
+def _read_observation(observation) -> pd.DataFrame:
+    """
+    Convert the incoming observation into a pandas DataFrame.
+
+    A DataFrame (e.g. loaded locally with pd.read_csv) is used as-is, so the
+    CSV -> list[dict] -> DataFrame round-trip is skipped entirely.
+    """
+    # Option 1: If the data is already a DataFrame
+    if isinstance(observation, pd.DataFrame):
+        return observation
+    # Option 2: If the data is a JSON string that needs to be deserialized
+    if isinstance(observation, str):
+        return _parse_observation_json(observation)  # In Meta Agent
+    # Option 3: If the data is already a list of row dictionaries
+    return _records_to_frame(observation)  # In Local
+
+def _read_observation_file(observation_path: str) -> pd.DataFrame:
+    """
+    Read the observation straight from a file into a typed DataFrame, avoiding the
+    intermediate list of row dictionaries. Parquet files (columnar, compressed,
+    requires pyarrow) are preferred; CSV is kept as the legacy format and read with the C parser.
+    """
+    if observation_path.lower().endswith(".parquet"):
+        return pd.read_parquet(observation_path)
+    return pd.read_csv(observation_path, engine="c", low_memory=False)
+
+@lru_cache(maxsize=32)
+def _parse_causal_relationships(causal_relationships: str) -> tuple:
+    """
+    Parse the string-formatted edge list, caching the result per distinct string.
+    JSON arrays (e.g. '[["A", "B"]]') are the preferred wire format and are decoded
+    with orjson; the Python tuple notation falls back to ast.literal_eval.
+    """
+    causal_relationships = causal_relationships.strip()
+    try:
+        edges = orjson.loads(causal_relationships)
+    except orjson.JSONDecodeError:
+        edges = ast.literal_eval(causal_relationships)
+    return tuple(tuple(edge) for edge in edges)
+
+def _read_causal_relationships(causal_relationships) -> tuple:
+    """
+    Return the causal graph edges as a hashable tuple of pairs, taking a native
+    list/tuple of pairs directly and parsing (with caching) the legacy string format otherwise.
+    """
+    if isinstance(causal_relationships, (list, tuple)):
+        return tuple(tuple(edge) for edge in causal_relationships)
+    return _parse_causal_relationships(causal_relationships)
+
+@lru_cache(maxsize=32)
+def _build_causal_graph(edges: tuple) -> nx.DiGraph:
+    """
+    Build the causal graph once per distinct edge list. The graph is frozen because
+    it is shared between calls; callers that need to modify it must copy it first.
+    """
+    return nx.freeze(nx.DiGraph(edges))
+
+# Unfitted mechanisms picked by auto-assignment, keyed by (edges, model type, quality, data fingerprint)
+_MECHANISM_ASSIGNMENTS: dict = {}
+_MAX_MECHANISM_ASSIGNMENTS = 8
+
+def _observation_fingerprint(observation: pd.DataFrame) -> str:
+    """
+    Content hash of the observation (column names and values, ignoring the index).
+    """
+    digest = hashlib.sha1(repr(tuple(observation.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(observation, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def _assign_causal_mechanisms(causal_model, observation: pd.DataFrame, cache_key: tuple) -> None:
+    """
+    Auto-assign causal mechanisms, replaying a previous assignment as fresh unfitted clones
+    when the same graph, model type, quality and data were seen before, which skips the
+    per-node model-selection search.
+    """
+    assignment = _MECHANISM_ASSIGNMENTS.get(cache_key)
+    if assignment is None:
+        gcm.auto.assign_causal_mechanisms(causal_model, observation, quality=cache_key[2])
+        if len(_MECHANISM_ASSIGNMENTS) >= _MAX_MECHANISM_ASSIGNMENTS:
+            # Evict the oldest entry
+            _MECHANISM_ASSIGNMENTS.pop(next(iter(_MECHANISM_ASSIGNMENTS)))
+        _MECHANISM_ASSIGNMENTS[cache_key] = {node: causal_model.causal_mechanism(node).clone() for node in causal_model.graph.nodes}
+    else:
+        for node, mechanism in assignment.items():
+            causal_model.set_causal_mechanism(node, mechanism.clone())
 
 def on_receive(data: dict) -> dict:
     """
@@ -31,20 +160,31 @@ def on_receive(data: dict) -> dict:
 
     Args:
         data (dict): A dictionary containing:
-        - observation (str): Telemetry data from the CSV file
-        - causal_relationships (str): String representation of causal graph edges
+        - observation (str | list[dict] | pd.DataFrame): Telemetry data from the CSV file
+        - observation_path (str, optional): Path to a Parquet or CSV file, read directly instead of "observation"
+        - observation_dtypes (dict, optional): Mapping of column name to dtype applied after loading
+        - categorical_columns (list[str], optional): Columns to convert to the pandas category dtype
+        - downcast_float32 (bool, optional): Fit on float32 copies of the float64 columns (default False)
+        - causal_relationships (str | list[tuple]): String representation of causal graph edges
+          (JSON arrays such as '[["A", "B"]]' preferred), or a native list of (source, target) tuples
         - causal_model_type (str): Model type, either "invertible" or "non-invertible"
         - model_path (str): Directory path where the trained model should be saved
-        - model_name (str): Name of the model to be saved
+        - model_name (str, optional): Name of the model to be saved (default "invertible_causal_model")
+        - compress (str | int | list, optional): joblib compression for the saved model, e.g. ["lz4", 3]
+          ("lz4" requires the lz4 package) or 3 for zlib level 3; default None saves an uncompressed pickle
+        - quality (str, optional): Auto-assignment quality, "GOOD" (default, fastest), "BETTER" or "BEST"
 
     Returns:
         dict: Result dictionary containing:
-        - timestamp (str): Timestamp of process completion
+        - timestamp (str): Timestamp when the request was received (before the model is built)
         - status (str): "success" or "error"
         - message (str): Description of the outcome
         - causal_model_type (str): Model type used (echoed from input)
         - saved_path (str): Path where model was saved, or None if error
     """
+    # Capture timestamp once, shared by the success and error results
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")  # e.g., '2025-04-14 14:25:00'
+
     try:
         # Retrieve input parameters from the data dictionary
         causal_model_type = data.get("causal_model_type")
@@ -52,18 +192,26 @@ def on_receive(data: dict) -> dict:
         gcm.util.general.set_random_seed(0)
 
         # --- Step 0: Read the test dataset into a pandas DataFrame
-        # Option 1: If the data is a JSON string that needs to be deserialized
-        if isinstance(data['observation'], str):
-            deserialized_data = json.loads(data['observation'])  # In Meta Agent
-        # Option 2: If the data is already a dictionary
+        if data.get('observation_path'):
+            observation = _read_observation_file(data['observation_path'])
         else:
-            deserialized_data = data['observation']  # In Local
-        observation = pd.DataFrame(deserialized_data)
+            observation = _read_observation(data['observation'])
+        # Optional caller-supplied schema, e.g. {"engine_rpm": "float64"}, to skip dtype inference downstream
+        if data.get('observation_dtypes'):
+            observation = observation.astype(data['observation_dtypes'], copy=False)
+        # Known discrete columns as pandas categoricals, so their categories are stored once instead of per row
+        if data.get('categorical_columns'):
+            observation = observation.astype({column: 'category' for column in data['categorical_columns']}, copy=False)
+        # Optionally downcast float64 columns to float32, halving memory traffic in the regressors
+        if data.get('downcast_float32', False):
+            float_columns = observation.select_dtypes('float64').columns
+            observation = observation.astype({column: 'float32' for column in float_columns}, copy=False)
 
         # --- Step 1: Define Causal Model ---
         # Create a directed graph representing the causal relationships
-        causal_relationship = ast.literal_eval(data["causal_relationships"].strip())
-        causal_graph = nx.DiGraph(causal_relationship)
+        # The structural causal model stores its mechanisms on the graph nodes, so it gets its own copy
+        causal_relationship = _read_causal_relationships(data["causal_relationships"])
+        causal_graph = nx.DiGraph(_build_causal_graph(causal_relationship))
 
         # Create the structural causal model object
         if causal_model_type == "non-invertible":
@@ -72,20 +220,32 @@ def on_receive(data: dict) -> dict:
             causal_model = gcm.InvertibleStructuralCausalModel(causal_graph)
 
         # Automatically assign generative models (causal mechanisms)
-        summary_auto_assignment = gcm.auto.assign_causal_mechanisms(causal_model, observation)
+        # GOOD (default) only compares a few fast model families per node; BETTER/BEST search more broadly
+        assignment_quality = gcm.auto.AssignmentQuality[data.get("quality", "GOOD").upper()]
+        _assign_causal_mechanisms(
+            causal_model,
+            observation,
+            (causal_relationship, causal_model_type, assignment_quality, _observation_fingerprint(observation))
+        )
 
         # --- Step 2: Fit Causal Models to Data ---
+        # Re-seed so the fit does not depend on whether the assignment search ran or was replayed
+        gcm.util.general.set_random_seed(0)
         gcm.fit(causal_model, observation)
 
         # --- Step 3: Save the fitted model to a file
-        model_save_path = os.path.join(data["model_path"], f'{data["model_name"]}.pkl')
-        with open(model_save_path, 'wb') as file:
-            pickle.dump(causal_model, file)
-
-        # If all above steps are successful
-        # Add this before creating the result dictionary
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # e.g., '2025-04-14 14:25:00'
-        
+        model_name = data.get("model_name", "invertible_causal_model")
+        model_save_path = os.path.join(data["model_path"], f'{model_name}.pkl')
+        # Protocol 5 serializes the fitted models' numpy arrays as raw buffers (smaller, faster to load)
+        # in both the plain pickle and the optional joblib-compressed file
+        compress = data.get("compress")
+        if compress:
+            # Compressed file (e.g. ["lz4", 3]); the fitted models' numpy arrays compress well
+            joblib.dump(causal_model, model_save_path, compress=tuple(compress) if isinstance(compress, list) else compress, protocol=pickle.HIGHEST_PROTOCOL)
+        else:
+            with open(model_save_path, 'wb') as file:
+                pickle.dump(causal_model, file, protocol=pickle.HIGHEST_PROTOCOL)
+
         result = {
             "timestamp": timestamp,
             "status": "success",
@@ -96,9 +256,6 @@ def on_receive(data: dict) -> dict:
 
     except Exception as e:
         # If there is any exception
-        # Add this before creating the result dictionary
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # e.g., '2025-04-14 14:25:00'
-
         result = {
             "timestamp": timestamp,
             "status": "error",
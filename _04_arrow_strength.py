@@ -16,14 +16,56 @@ def on_create(data: dict) -> dict | None:
 
 # Import necessary libraries
 from dowhy import gcm
-from datetime import datetime
+import time
 import pickle
+import joblib
+import mmap
+import os
+from functools import lru_cache
 import warnings
-import json
+import orjson
 import numpy as np
 
-# Suppress all warnings
-warnings.filterwarnings("ignore")
+# Disable DoWhy progress bars; they write to stderr synchronously on every call
+gcm.config.disable_progress_bars()
+
+# Uncompressed pickles (protocol 2+) start with the PROTO opcode; anything else was compressed by joblib
+_PICKLE_MAGIC = b"\x80"
+
+@lru_cache(maxsize=4)
+def _load_model(model_path: str, mtime: float):
+    """
+    Load a pickled causal model, caching it per (path, modification time) so
+    repeated queries reuse the deserialized model. Re-saving the model changes
+    its mtime and therefore invalidates the cached entry.
+
+    The file is memory-mapped and unpickled straight from the page cache, which
+    avoids copying it through a buffered reader first.
+    """
+    with open(model_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+        if mapped_file[:1] != _PICKLE_MAGIC:
+            # Saved compressed with joblib (see "compress" in _02_build_causal_model)
+            return joblib.load(model_path)
+        return pickle.loads(mapped_file)
+
+def _dumps(value) -> str:
+    """
+    Encode a result value as a JSON string with orjson; numpy arrays and scalars are
+    serialized natively, without converting them to Python lists first.
+    """
+    return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+def _without_warnings(estimation_func):
+    """
+    Wrap a bootstrap estimation function so that warnings are suppressed where it runs. A filter
+    set in this process does not reach the joblib (loky) worker processes that run the replicates,
+    so the filter is set inside each replicate instead.
+    """
+    def estimate():
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return estimation_func()
+    return estimate
 
 def on_receive(data: dict) -> dict:
     """
@@ -42,6 +84,7 @@ def on_receive(data: dict) -> dict:
         A dictionary containing:
             - "model_path" (str): Path to the serialized causal model file (.pkl).
             - "target_node" (str): Name of the target node in the causal graph.
+            - "n_jobs" (int, optional): Number of parallel workers for the bootstrap replicates (default -1, all cores).
 
     Returns
     -------
@@ -63,60 +106,68 @@ def on_receive(data: dict) -> dict:
                                          their percentage contributions.
             - "arrow_strengths_node_intervals": JSON-encoded dictionary of node-level 
                                                 95% confidence intervals.
-    """
-    def convert_to_percentage(value_dictionary: dict) -> dict:
-        total_absolute_sum = np.sum([abs(v) for v in value_dictionary.values()])
-        if total_absolute_sum == 0:
-            # Avoid division by zero
-            return {k: 0 for k in value_dictionary}
-        return {k: abs(v) / total_absolute_sum * 100 for k, v in value_dictionary.items()}
 
+    Notes:
+    ------
+    - Key order of the JSON dictionaries: the strength and interval outputs (node and edge) are
+      ordered by rounded strength, descending; the two percentage outputs by rounded percentage,
+      descending. Ties keep DoWhy's edge order. The edge and interval outputs were previously
+      left in DoWhy's edge order; their values are unchanged.
+    """
     # Capture timestamp early
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
 
     try:
         # Safely access required keys
         target_node = data.get("target_node")
         model_path = data.get("model_path")
+        n_jobs = data.get("n_jobs", -1)
 
         # Set a fixed random seed for reproducibility
         gcm.util.general.set_random_seed(0)
 
         # Step 1: Load the pre-trained causal model from file
-        with open(model_path, 'rb') as file:
-            causal_model = pickle.load(file)
+        causal_model = _load_model(model_path, os.path.getmtime(model_path))
 
         # Step 2: Causal Query - Direct Arrow Strength
+        # Bootstrap replicates are independent, so they run in parallel; DoWhy seeds each replicate
+        # from the global RNG, keeping the result reproducible. arrow_strength itself is kept
+        # single-threaded inside each replicate to avoid oversubscribing the cores.
+        # Warnings from the estimation are suppressed inside each replicate, in this process or a
+        # worker; the rest of the process still reports them
         arrow_strengths_median, arrow_strengths_intervals = gcm.confidence_intervals(
-            gcm.bootstrap_sampling(gcm.arrow_strength,
-                                   causal_model,
-                                   target_node=target_node))
-        
-        arrow_strengths = arrow_strengths_median
-        arrow_strengths_pct = convert_to_percentage(arrow_strengths)
-
-        # Node Version
-        # --- Prepare Output Dictionary (sorted descending by value) ---
-        arrow_strengths_node = dict(
-            sorted(
-                ((treatment, round(value, 2)) for (treatment, _), value in arrow_strengths.items()),
-                key=lambda item: item[1],
-                reverse=True
-            )
-        )
-        arrow_strengths_pct_node = dict(
-            sorted(
-                ((treatment, round(value, 2)) for (treatment, _), value in arrow_strengths_pct.items()),
-                key=lambda item: item[1],
-                reverse=True
-            )
-        )
-        arrow_strengths_intervals_node = dict((treatment, [round(x, 2) for x in value.tolist()]) for (treatment, _), value in arrow_strengths_intervals.items())
-
-        #Edge version
-        arrow_strengths_edge_str = {f"({k[0]}, {k[1]})": round(v, 2) for k, v in arrow_strengths.items()}
-        arrow_strengths_pct_edge_str = {f"({k[0]}, {k[1]})": round(v, 2) for k, v in arrow_strengths_pct.items()}
-        arrow_strengths_intervals_edge_str = {f"({k[0]}, {k[1]})": [round(x, 2) for x in v.tolist()] for k, v in arrow_strengths_intervals.items()}
+            _without_warnings(gcm.bootstrap_sampling(gcm.arrow_strength,
+                                                     causal_model,
+                                                     target_node=target_node,
+                                                     n_jobs=1)),
+            n_jobs=n_jobs)
+
+        # --- Prepare Output Dictionaries (sorted descending by value) ---
+        # The strengths are read into one array that yields the rounded values, the percentages and
+        # two rankings (the stable argsorts keep ties in insertion order like sorted() did): the
+        # strengths and intervals follow the rounded signed strengths, the percentages follow the
+        # rounded percentages, which rank differently when a strength is negative
+        edges = list(arrow_strengths_median)
+        values = np.fromiter(arrow_strengths_median.values(), dtype=np.float64, count=len(edges))
+        absolute_values = np.abs(values)
+        total_absolute_sum = absolute_values.sum()
+        # Avoid division by zero: all-zero values give 0.0 percentages, floats like every other percentage
+        pct = absolute_values * (100.0 / total_absolute_sum) if total_absolute_sum != 0 else np.zeros_like(values)
+        rounded_values, rounded_pct = np.round(values, 2), np.round(pct, 2)
+        order = np.argsort(-rounded_values, kind="stable").tolist()
+        pct_order = np.argsort(-rounded_pct, kind="stable").tolist()
+        rounded_values, rounded_pct = rounded_values.tolist(), rounded_pct.tolist()
+        format_edge = "(%s, %s)".__mod__
+        edge_strs = [format_edge(edge) for edge in edges]
+        arrow_strengths_node, arrow_strengths_intervals_node = {}, {}
+        arrow_strengths_edge_str, arrow_strengths_intervals_edge_str = {}, {}
+        for i in order:
+            edge = edges[i]
+            treatment, edge_str = edge[0], edge_strs[i]
+            arrow_strengths_node[treatment] = arrow_strengths_edge_str[edge_str] = rounded_values[i]
+            arrow_strengths_intervals_node[treatment] = arrow_strengths_intervals_edge_str[edge_str] = np.round(arrow_strengths_intervals[edge], 2)
+        arrow_strengths_pct_node = {edges[i][0]: rounded_pct[i] for i in pct_order}
+        arrow_strengths_pct_edge_str = {edge_strs[i]: rounded_pct[i] for i in pct_order}
 
         # Return successful evaluation result
         result = {
@@ -124,12 +175,12 @@ def on_receive(data: dict) -> dict:
             "status": "success",
             "message": "Arrow strengths calculated successfully.",
             "target_node": target_node,
-            "arrow_strength_edge": json.dumps(arrow_strengths_edge_str),
-            "arrow_strength_edge_pct": json.dumps(arrow_strengths_pct_edge_str),
-            "arrow_strengths_edge_intervals": json.dumps(arrow_strengths_intervals_edge_str),
-            "arrow_strength_node": json.dumps(arrow_strengths_node),
-            "arrow_strength_node_pct": json.dumps(arrow_strengths_pct_node),
-            "arrow_strengths_node_intervals": json.dumps(arrow_strengths_intervals_node)
+            "arrow_strength_edge": _dumps(arrow_strengths_edge_str),
+            "arrow_strength_edge_pct": _dumps(arrow_strengths_pct_edge_str),
+            "arrow_strengths_edge_intervals": _dumps(arrow_strengths_intervals_edge_str),
+            "arrow_strength_node": _dumps(arrow_strengths_node),
+            "arrow_strength_node_pct": _dumps(arrow_strengths_pct_node),
+            "arrow_strengths_node_intervals": _dumps(arrow_strengths_intervals_node)
         }
 
     except Exception as e:
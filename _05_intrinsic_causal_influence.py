@@ -16,15 +16,60 @@ def on_create(data: dict) -> dict | None:
 
 # Import necessary libraries
 from dowhy import gcm
-from datetime import datetime
+import time
 import pickle
+import joblib
+import mmap
+import os
+from functools import lru_cache
 import warnings
-import json
+import orjson
 import numpy as np
 
 # Suppress all warnings
 warnings.filterwarnings("ignore")
 
+# Disable DoWhy progress bars; they write to stderr synchronously on every call
+gcm.config.disable_progress_bars()
+
+# Uncompressed pickles (protocol 2+) start with the PROTO opcode; anything else was compressed by joblib
+_PICKLE_MAGIC = b"\x80"
+
+@lru_cache(maxsize=4)
+def _load_model(model_path: str, mtime: float):
+    """
+    Load a pickled causal model, caching it per (path, modification time) so
+    repeated queries reuse the deserialized model. Re-saving the model changes
+    its mtime and therefore invalidates the cached entry.
+
+    The file is memory-mapped and unpickled straight from the page cache, which
+    avoids copying it through a buffered reader first.
+    """
+    with open(model_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+        if mapped_file[:1] != _PICKLE_MAGIC:
+            # Saved compressed with joblib (see "compress" in _02_build_causal_model)
+            return joblib.load(model_path)
+        return pickle.loads(mapped_file)
+
+def _dumps(value) -> str:
+    """
+    Encode a result value as a JSON string with orjson; numpy arrays and scalars are
+    serialized natively, without converting them to Python lists first.
+    """
+    return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+def _without_warnings(estimation_func):
+    """
+    Wrap a bootstrap estimation function so that warnings are suppressed where it runs. The
+    filter set at import does not reach the joblib (loky) worker processes that run the
+    replicates, so the filter is set inside each replicate as well.
+    """
+    def estimate():
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return estimation_func()
+    return estimate
+
 def on_receive(data: dict) -> dict:
     """
     Evaluate intrinsic causal influences for a specified target node using a pre-trained causal model.
@@ -38,6 +83,7 @@ def on_receive(data: dict) -> dict:
             - "model_path" (str): Path to the serialized causal model (Pickle format).
             - "target_node" (str): Name of the node in the causal graph for which intrinsic influence is evaluated.
             - "num_samples_randomization" (int): Number of samples randomization
+            - "n_jobs" (int, optional): Number of parallel workers for the bootstrap replicates (default -1, all cores).
 
     Returns:
         dict: A dictionary containing:
@@ -51,58 +97,52 @@ def on_receive(data: dict) -> dict:
             - "intrinsic_influence_pct" (str): JSON string of a dictionary mapping treatment nodes to their 
               percentage influence contribution (sorted descending).
             - "intrinsic_influence_intervals" (str): JSON string of a dictionary mapping treatment nodes 
-              to confidence intervals [lower_bound, upper_bound].
+              to confidence intervals [lower_bound, upper_bound] (in the same order as "intrinsic_influence").
     """
-    def convert_to_percentage(value_dictionary: dict) -> dict:
-        total_absolute_sum = np.sum([abs(v) for v in value_dictionary.values()])
-        if total_absolute_sum == 0:
-            # Avoid division by zero
-            return {k: 0 for k in value_dictionary}
-        return {k: abs(v) / total_absolute_sum * 100 for k, v in value_dictionary.items()}
-
     # Capture timestamp early
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
 
     try:
         # Safely access required keys
         target_node = data.get("target_node")
         model_path = data.get("model_path")
         num_samples_randomization = data.get("num_samples_randomization")
+        n_jobs = data.get("n_jobs", -1)
 
         # Set a fixed random seed for reproducibility
         gcm.util.general.set_random_seed(0)
 
         # Step 1: Load the pre-trained causal model from file
-        with open(model_path, 'rb') as file:
-            causal_model = pickle.load(file)
+        causal_model = _load_model(model_path, os.path.getmtime(model_path))
 
         # Step 2: Causal Query - Intrinsic Causal Influence
+        # Bootstrap replicates are independent, so they run in parallel; DoWhy seeds each replicate
+        # from the global RNG, keeping the result reproducible. The Shapley estimation inside each
+        # replicate is kept single-threaded to avoid oversubscribing the cores.
         intrinsic_influence_median,  intrinsic_influence_intervals = gcm.confidence_intervals(
-            gcm.bootstrap_sampling(gcm.intrinsic_causal_influence,
-                                   causal_model,
-                                   target_node=target_node, 
-                                   num_samples_randomization=num_samples_randomization))
+            _without_warnings(gcm.bootstrap_sampling(gcm.intrinsic_causal_influence,
+                                                     causal_model,
+                                                     target_node=target_node, 
+                                                     num_samples_randomization=num_samples_randomization,
+                                                     shapley_config=gcm.shapley.ShapleyConfig(n_jobs=1))),
+            n_jobs=n_jobs)
         
-        intrinsic_influence = intrinsic_influence_median
-        intrinsic_influence_pct = convert_to_percentage(intrinsic_influence)
-
-        # --- Prepare Output Dictionary (sorted descending by value) ---
-        intrinsic_influence_dict = dict(
-            sorted(
-                ((treatment, round(value, 2)) for treatment, value in intrinsic_influence.items()),
-                key=lambda item: item[1],
-                reverse=True
-            )
-        )
-
-        intrinsic_influence_pct_dict = dict(
-            sorted(
-                ((treatment, round(value, 2)) for treatment, value in intrinsic_influence_pct.items()),
-                key=lambda item: item[1],
-                reverse=True
-            )
-        )
-        intrinsic_influence_intervals_dict = dict((treatment, [round(x, 2) for x in value.tolist()]) for treatment, value in intrinsic_influence_intervals.items())
+        # --- Prepare Output Dictionaries (sorted descending by value) ---
+        # The influences are read into one array that yields both the rounded values and the
+        # percentages; the stable argsorts keep ties in insertion order like sorted() did
+        treatments = list(intrinsic_influence_median)
+        values = np.fromiter(intrinsic_influence_median.values(), dtype=np.float64, count=len(treatments))
+        absolute_values = np.abs(values)
+        total_absolute_sum = absolute_values.sum()
+        # Avoid division by zero: all-zero values give 0.0 percentages, floats like every other percentage
+        pct = absolute_values * (100.0 / total_absolute_sum) if total_absolute_sum != 0 else np.zeros_like(values)
+        rounded_values, rounded_pct = np.round(values, 2), np.round(pct, 2)
+        order = np.argsort(-rounded_values, kind="stable").tolist()
+        pct_order = np.argsort(-rounded_pct, kind="stable").tolist()
+
+        intrinsic_influence_dict = dict(zip([treatments[i] for i in order], rounded_values[order].tolist()))
+        intrinsic_influence_pct_dict = dict(zip([treatments[i] for i in pct_order], rounded_pct[pct_order].tolist()))
+        intrinsic_influence_intervals_dict = {treatments[i]: np.round(intrinsic_influence_intervals[treatments[i]], 2) for i in order}
 
         # Return successful evaluation result
         result = {
@@ -111,9 +151,9 @@ def on_receive(data: dict) -> dict:
             "message": "Intrinsic influences calculated successfully.",
             "target_node": target_node,
             "num_samples_randomization": num_samples_randomization,
-            "intrinsic_influence": json.dumps(intrinsic_influence_dict),
-            "intrinsic_influence_pct": json.dumps(intrinsic_influence_pct_dict),
-            "intrinsic_influence_intervals": json.dumps(intrinsic_influence_intervals_dict)
+            "intrinsic_influence": _dumps(intrinsic_influence_dict),
+            "intrinsic_influence_pct": _dumps(intrinsic_influence_pct_dict),
+            "intrinsic_influence_intervals": _dumps(intrinsic_influence_intervals_dict)
         }
 
     except Exception as e:
@@ -16,15 +16,86 @@ def on_create(data: dict) -> dict | None:
 
 # Import necessary libraries
 from dowhy import gcm
-from datetime import datetime
+import time
 import pickle
+import joblib
+import mmap
+import os
+from functools import lru_cache, partial
+import operator
+from concurrent.futures import ThreadPoolExecutor
 import warnings
-import json
 import ast
+import re
+import base64
 
 # Suppress all warnings
 warnings.filterwarnings("ignore")
 
+# Uncompressed pickles (protocol 2+) start with the PROTO opcode; anything else was compressed by joblib
+_PICKLE_MAGIC = b"\x80"
+
+@lru_cache(maxsize=4)
+def _load_model(model_path: str, mtime: float):
+    """
+    Load a pickled causal model, caching it per (path, modification time) so
+    repeated queries reuse the deserialized model. Re-saving the model changes
+    its mtime and therefore invalidates the cached entry.
+
+    The file is memory-mapped and unpickled straight from the page cache, which
+    avoids copying it through a buffered reader first.
+    """
+    with open(model_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+        if mapped_file[:1] != _PICKLE_MAGIC:
+            # Saved compressed with joblib (see "compress" in _02_build_causal_model)
+            return joblib.load(model_path)
+        return pickle.loads(mapped_file)
+
+# A Python number literal: floats (leading zeros allowed) or integers (no leading zeros, as literal_eval requires)
+_INTERVENTION_NUMBER = r"[-+]?(?:(?:\d+\.\d*|\.\d+)(?:[eE][-+]?\d+)?|\d+[eE][-+]?\d+|0+|[1-9]\d*)"
+# One ('variable', number) pair of the intervention input, with single or double quotes
+_INTERVENTION_PAIR_PATTERN = r"""\(\s*(?:'([^'"\\\n]*)'|"([^'"\\\n]*)")\s*,\s*(%s)\s*\)""" % _INTERVENTION_NUMBER
+_INTERVENTION_PAIR = re.compile(_INTERVENTION_PAIR_PATTERN)
+# Exactly one list of comma-separated pairs (an optional trailing comma, as Python allows)
+_INTERVENTION_LIST = re.compile(r"\s*\[\s*(?:{pair}(?:\s*,\s*{pair})*\s*,?\s*)?\]\s*".format(pair=_INTERVENTION_PAIR_PATTERN))
+
+@lru_cache(maxsize=32)
+def _parse_intervention_input(intervention_input: str) -> tuple:
+    """
+    Parse the intervention input, e.g. "[('altitude', 5), ('ambient_temp', 3.5)]", into a
+    tuple of (variable, value) pairs, caching the result per distinct string.
+
+    The usual list of (name, number) pairs is read with precompiled regular expressions;
+    anything else (including malformed input) falls back to ast.literal_eval.
+    """
+    if _INTERVENTION_LIST.fullmatch(intervention_input):
+        # Integers stay int and everything else becomes float, as literal_eval would return them
+        return tuple((single_quoted or double_quoted, float(number) if any(c in number for c in ".eE") else int(number))
+                     for single_quoted, double_quoted, number in _INTERVENTION_PAIR.findall(intervention_input))
+    return tuple(tuple(pair) for pair in ast.literal_eval(intervention_input.strip()))
+
+def _atomic_intervention(value):
+    """Return an intervention that replaces every sample of the node with `value`."""
+    return lambda variable: value
+
+def _shift_intervention(value):
+    """Return an intervention that adds `value` to every sample of the node."""
+    # A C-level partial of operator.add instead of a Python lambda frame per sample
+    return partial(operator.add, value)
+
+def _samples_to_arrow_ipc(samples) -> str:
+    """
+    Serialize a samples DataFrame as a base64-encoded Arrow IPC stream, which consumers
+    decode with pyarrow.ipc.open_stream. pyarrow is only imported when this output
+    format is requested.
+    """
+    import pyarrow as pa
+    table = pa.Table.from_pandas(samples, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return base64.b64encode(sink.getvalue().to_pybytes()).decode()
+
 def on_receive(data: dict) -> dict:
     """
     Executes a causal intervention on a pre-trained model and returns simulated outcomes.
@@ -44,6 +115,9 @@ def on_receive(data: dict) -> dict:
         - "num_samples_to_draw" (int): Number of samples to generate from the interventional distribution.
         - "intervention_type" (str): The type of intervention, must be either "atomic" (value replacement)
           or "shift" (value adjustment).
+        - "downcast_float32" (bool, optional): Return the samples as float32 instead of float64 (default False).
+        - "output_format" (str, optional): "json" (default) for a JSON list of records, or "arrow" for a
+          base64-encoded Arrow IPC stream, which is smaller and faster for large sample sets (requires pyarrow).
 
     Returns:
     --------
@@ -54,33 +128,43 @@ def on_receive(data: dict) -> dict:
         - "message" (str): Description of success or error message.
         - "intervention_input" (str): The original intervention input received.
         - "intervention_type" (str): The type of intervention performed.
-        - "intervention_output" (str or None): A JSON string of the simulated intervention samples,
-          or None if an error occurred.
+        - "intervention_output" (str or None): A JSON string (list of records) of the simulated
+          intervention samples (or a base64 Arrow IPC stream with output_format "arrow"), or None if an error occurred.
     """
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
     try:
         # Retrieve input parameters from the data dictionary
         model_path = data.get("model_path")
-        intervention_user_input = ast.literal_eval(data.get("intervention_input").strip())
         num_samples_to_draw = data.get("num_samples_to_draw")
         intervention_type = data.get("intervention_type")
-        
+        # Step 1: Load the pre-trained causal model from file in the background (disk I/O and
+        # unpickling) while the intervention input is parsed
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            model_future = executor.submit(_load_model, model_path, os.path.getmtime(model_path))
+            intervention_user_input = _parse_intervention_input(data.get("intervention_input"))
+            causal_model = model_future.result()
+
         # Set a fixed random seed for reproducibility
         gcm.util.general.set_random_seed(0)
-
-        # Step 1: Load the pre-trained causal model from file
-        with open(model_path, 'rb') as file:
-            causal_model = pickle.load(file)
         
         # Step 2: Format intervention input as a dictionary of lambda functions
+        # DoWhy applies each function element-wise (map over the node's samples), so the
+        # functions stay scalar; the value is captured once per variable by the factories.
         if intervention_type == "atomic":
-            intervention = {key: (lambda value: lambda variable: value)(val) for key, val in intervention_user_input}
+            intervention = {key: _atomic_intervention(val) for key, val in intervention_user_input}
         elif intervention_type == "shift":
-            intervention = {key: (lambda value: lambda variable: variable + value)(val) for key, val in intervention_user_input}
+            intervention = {key: _shift_intervention(val) for key, val in intervention_user_input}
 
         # Step 3: Causal Query - Interventional Sample
         intervention_sample = gcm.interventional_samples(causal_model, intervention, num_samples_to_draw=num_samples_to_draw)
-        intervention_sample_json = intervention_sample.to_json(orient='records')
+        # Optionally downcast the float64 samples to float32, halving the bytes serialized and returned
+        if data.get("downcast_float32", False):
+            float_columns = intervention_sample.select_dtypes('float64').columns
+            intervention_sample = intervention_sample.astype({column: 'float32' for column in float_columns}, copy=False)
+        if data.get("output_format", "json") == "arrow":
+            intervention_sample_json = _samples_to_arrow_ipc(intervention_sample)
+        else:
+            intervention_sample_json = intervention_sample.to_json(orient='records')
 
         # Return successful evaluation result
         result = {
@@ -89,7 +173,7 @@ def on_receive(data: dict) -> dict:
             "message": "Successful Intervention.",
             "intervention_input": data.get("intervention_input"),
             "intervention_type": intervention_type,
-            "intervention_output": json.dumps(intervention_sample_json)
+            "intervention_output": intervention_sample_json
         }
 
     except Exception as e:
@@ -16,16 +16,86 @@ def on_create(data: dict) -> dict | None:
 
 # Import necessary libraries
 from dowhy import gcm
-from datetime import datetime
+import time
 import pickle
+import joblib
+import mmap
+import os
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 import warnings
-import json
+import orjson
 import ast
 import pandas as pd
+import base64
+import numpy as np
 
 # Suppress all warnings
 warnings.filterwarnings("ignore")
 
+# Uncompressed pickles (protocol 2+) start with the PROTO opcode; anything else was compressed by joblib
+_PICKLE_MAGIC = b"\x80"
+
+@lru_cache(maxsize=4)
+def _load_model(model_path: str, mtime: float):
+    """
+    Load a pickled causal model, caching it per (path, modification time) so
+    repeated queries reuse the deserialized model. Re-saving the model changes
+    its mtime and therefore invalidates the cached entry.
+
+    The file is memory-mapped and unpickled straight from the page cache, which
+    avoids copying it through a buffered reader first.
+    """
+    with open(model_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+        if mapped_file[:1] != _PICKLE_MAGIC:
+            # Saved compressed with joblib (see "compress" in _02_build_causal_model)
+            return joblib.load(model_path)
+        return pickle.loads(mapped_file)
+
+def _atomic_intervention(value):
+    """Return an intervention that replaces every sample of the node with `value`."""
+    return lambda variable: value
+
+def _read_observation(observation) -> pd.DataFrame:
+    """
+    Convert the incoming observation into a pandas DataFrame, using a DataFrame
+    handed over by an upstream step as-is instead of rebuilding it.
+    """
+    if isinstance(observation, pd.DataFrame):
+        return observation
+    if isinstance(observation, str):
+        observation = orjson.loads(observation)
+    return pd.DataFrame(data=observation)
+
+def _echo_json(value) -> str:
+    """
+    Encode an input for echoing back in the result. A string is returned unchanged; anything else
+    (including a DataFrame) is encoded with orjson, numpy values natively and non-string keys as
+    strings. Values orjson still cannot encode (e.g. integers wider than 64 bits) fall back to
+    str(), so the echo never raises.
+    """
+    if isinstance(value, str):
+        return value
+    try:
+        if isinstance(value, pd.DataFrame):
+            value = value.to_dict(orient="list")
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS, default=str).decode()
+    except Exception:
+        return str(value)
+
+def _samples_to_arrow_ipc(samples: pd.DataFrame) -> str:
+    """
+    Serialize a samples DataFrame as a base64-encoded Arrow IPC stream, which consumers
+    decode with pyarrow.ipc.open_stream. pyarrow is only imported when this output
+    format is requested.
+    """
+    import pyarrow as pa
+    table = pa.Table.from_pandas(samples, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return base64.b64encode(sink.getvalue().to_pybytes()).decode()
+
 def on_receive(data: dict) -> dict:
     """
     Perform a counterfactual query using a pre-trained causal model.
@@ -48,7 +118,13 @@ def on_receive(data: dict) -> dict:
         - "observation": str
             A JSON-formatted string representing the observed data as a dictionary 
             with variable names as keys and lists of values, including all 
-            treatments, features, and outcome variables.
+            treatments, features, and outcome variables. A pandas DataFrame is also
+            accepted and used without conversion.
+        - "downcast_float32": bool, optional
+            Return the counterfactual samples as float32 instead of float64 (default False).
+        - "output_format": str, optional
+            "json" (default) for a JSON list of records, or "arrow" for a base64-encoded
+            Arrow IPC stream, which is smaller and faster for large sample sets (requires pyarrow).
 
     Returns:
     --------
@@ -65,7 +141,8 @@ def on_receive(data: dict) -> dict:
         - "observation": str
             The original observation string.
         - "counterfactual_output": str or None
-            JSON-formatted list of counterfactual samples if successful, else None.
+            JSON-formatted list of counterfactual samples (records), or a base64 Arrow IPC
+            stream with output_format "arrow", if successful, else None.
 
     Notes:
     ------
@@ -73,26 +150,39 @@ def on_receive(data: dict) -> dict:
     - Assumes that the causal model is invertible and compatible with the input format.
     - All features used in the causal model must be present in the observation data.
     """
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    # Echo the observation back as a JSON string, encoded once for both result branches
+    observation_input = _echo_json(data.get("observation"))
     try:
         # Retrieve input parameters from the data dictionary
         model_path = data.get("model_path")
-        counterfactual_user_input = ast.literal_eval(data.get("counterfactual_input").strip())
-        observation = pd.DataFrame(data=json.loads(data.get("observation")))
+        # Step 1: Load the pre-trained causal model from file in the background (disk I/O and
+        # unpickling) while the counterfactual input and the observation are parsed
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            model_future = executor.submit(_load_model, model_path, os.path.getmtime(model_path))
+            counterfactual_user_input = ast.literal_eval(data.get("counterfactual_input").strip())
+            observation = _read_observation(data.get("observation"))
+            # Numeric columns as one contiguous float64 block, the dtype the noise inference computes in
+            numeric_columns = observation.select_dtypes("number").columns
+            observation = observation.astype(dict.fromkeys(numeric_columns, np.float64), copy=False)
+            causal_model = model_future.result()
 
         # Set a fixed random seed for reproducibility
         gcm.util.general.set_random_seed(0)
-
-        # Step 1: Load the pre-trained causal model from file
-        with open(model_path, 'rb') as file:
-            causal_model = pickle.load(file)
         
         # Step 2: Format intervention input as a dictionary of lambda functions
-        counterfactual = {key: (lambda value: lambda variable: value)(val) for key, val in counterfactual_user_input}
+        counterfactual = {key: _atomic_intervention(val) for key, val in counterfactual_user_input}
 
         # Step 3: Causal Query - Counterfactual Result
         counterfactuals_sample = gcm.counterfactual_samples(causal_model, counterfactual, observed_data=observation)
-        counterfactuals_sample_json = counterfactuals_sample.to_json(orient='records')
+        # Optionally downcast the float64 samples to float32, halving the bytes serialized and returned
+        if data.get("downcast_float32", False):
+            float_columns = counterfactuals_sample.select_dtypes('float64').columns
+            counterfactuals_sample = counterfactuals_sample.astype({column: 'float32' for column in float_columns}, copy=False)
+        if data.get("output_format", "json") == "arrow":
+            counterfactuals_sample_json = _samples_to_arrow_ipc(counterfactuals_sample)
+        else:
+            counterfactuals_sample_json = counterfactuals_sample.to_json(orient='records')
 
         # Return successful evaluation result
         result = {
@@ -100,8 +190,8 @@ def on_receive(data: dict) -> dict:
             "status": "success",
             "message": "Successful Counterfactual.",
             "counterfactual_input": data.get("counterfactual_input"),
-            "observation": json.dumps(data.get("observation")),
-            "counterfactual_output": json.dumps(counterfactuals_sample_json)
+            "observation": observation_input,
+            "counterfactual_output": counterfactuals_sample_json
         }
 
     except Exception as e:
@@ -111,7 +201,7 @@ def on_receive(data: dict) -> dict:
             "status": "error",
             "message": str(e),
             "counterfactual_input": data.get("counterfactual_input"),
-            "observation": json.dumps(data.get("observation")),
+            "observation": observation_input,
             "counterfactual_output": None
         }
 
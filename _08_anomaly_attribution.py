@@ -16,16 +16,210 @@ def on_create(data: dict) -> dict | None:
 
 # Import necessary libraries
 from dowhy import gcm
-from datetime import datetime
+import time
 import pickle
+import joblib
+import mmap
+import os
+from functools import lru_cache
 import warnings
-import json
+import orjson
 import pandas as pd
 import numpy as np
+from dowhy.gcm.confidence_intervals import estimate_geometric_median
 
 # Suppress all warnings
 warnings.filterwarnings("ignore")
 
+# Disable DoWhy progress bars; they write to stderr synchronously on every call
+gcm.config.disable_progress_bars()
+
+# Uncompressed pickles (protocol 2+) start with the PROTO opcode; anything else was compressed by joblib
+_PICKLE_MAGIC = b"\x80"
+
+@lru_cache(maxsize=4)
+def _load_model(model_path: str, mtime: float):
+    """
+    Load a pickled causal model, caching it per (path, modification time) so
+    repeated queries reuse the deserialized model. Re-saving the model changes
+    its mtime and therefore invalidates the cached entry.
+
+    The file is memory-mapped and unpickled straight from the page cache, which
+    avoids copying it through a buffered reader first.
+    """
+    with open(model_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+        if mapped_file[:1] != _PICKLE_MAGIC:
+            # Saved compressed with joblib (see "compress" in _02_build_causal_model)
+            return joblib.load(model_path)
+        return pickle.loads(mapped_file)
+
+def _anomaly_data_to_frame(anomaly_data) -> pd.DataFrame:
+    """
+    Build a DataFrame from a dictionary of column lists (or any other pandas-compatible input).
+    """
+    if isinstance(anomaly_data, dict) and anomaly_data:
+        # Numeric columns of equal length (typically one row) become a single float64 block,
+        # skipping pandas' per-column dtype inference; anything else takes the generic path
+        columns = list(anomaly_data)
+        try:
+            values = np.array([anomaly_data[column] for column in columns], dtype=np.float64)
+        except (TypeError, ValueError):
+            pass
+        else:
+            if values.ndim == 2:
+                return pd.DataFrame(values.T, columns=columns, copy=False)
+    return pd.DataFrame(data=anomaly_data)
+
+@lru_cache(maxsize=128)
+def _parse_anomaly_data_json(raw_anomaly_data: str) -> pd.DataFrame:
+    """
+    Deserialize a JSON anomaly observation, caching the resulting DataFrame per payload so
+    re-scoring the same observation (e.g. what-if exploration) skips the JSON parse and
+    frame construction.
+
+    Anomaly payloads are treated as immutable: the cached frame is shared between calls
+    and must not be modified in place.
+    """
+    return _anomaly_data_to_frame(orjson.loads(raw_anomaly_data))
+
+def _read_anomaly_data(anomaly_data) -> pd.DataFrame:
+    """
+    Convert the incoming anomaly observation into a pandas DataFrame, using a
+    DataFrame handed over by an upstream step as-is instead of rebuilding it.
+    """
+    if isinstance(anomaly_data, pd.DataFrame):
+        # Numeric columns as one float64 block, so the noise inference reads the values
+        # without per-dtype copies in every bootstrap replicate (a no-op if already float64)
+        numeric_columns = anomaly_data.select_dtypes("number").columns
+        return anomaly_data.astype(dict.fromkeys(numeric_columns, np.float64), copy=False)
+    if isinstance(anomaly_data, str):
+        return _parse_anomaly_data_json(anomaly_data)
+    return _anomaly_data_to_frame(anomaly_data)
+
+def _dumps(value) -> str:
+    """
+    Encode a result value as a JSON string with orjson; numpy arrays and scalars are
+    serialized natively, without converting them to Python lists first.
+    """
+    return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+def _echo_json(value) -> str:
+    """
+    Encode an input for echoing back in the result. A string is returned unchanged; anything else
+    (including a DataFrame) is encoded with orjson, numpy values natively and non-string keys as
+    strings. Values orjson still cannot encode (e.g. integers wider than 64 bits) fall back to
+    str(), so the echo never raises.
+    """
+    if isinstance(value, str):
+        return value
+    try:
+        if isinstance(value, pd.DataFrame):
+            value = value.to_dict(orient="list")
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS, default=str).decode()
+    except Exception:
+        return str(value)
+
+def _convert_to_percentage(value_dictionary: dict) -> dict:
+    """
+    Express each value's magnitude as a percentage of the total absolute magnitude.
+    """
+    # The magnitudes are read into one array, summed and scaled in vectorized passes
+    absolute_values = np.abs(np.fromiter(value_dictionary.values(), dtype=np.float64, count=len(value_dictionary)))
+    total_absolute_sum = absolute_values.sum()
+    # Avoid division by zero: all-zero scores give 0.0 percentages, floats like every other percentage
+    if total_absolute_sum != 0:
+        absolute_values *= 100.0 / total_absolute_sum
+    return dict(zip(value_dictionary, absolute_values.tolist()))
+
+def _format_attribution(attribution_scores: dict, attribution_scores_intervals: dict) -> tuple:
+    """
+    Turn the attribution medians and intervals of one anomalous observation into the output
+    dictionaries: rounded scores and percentages (each sorted descending) and rounded intervals.
+    """
+    attribution_scores_pct = _convert_to_percentage(attribution_scores)
+
+    # The scores and percentages are each rounded in one vectorized pass and ordered by the
+    # rounded value (the stable argsort keeps ties in insertion order like sorted() did)
+    treatments = list(attribution_scores)
+    rounded_scores = np.round(np.fromiter(attribution_scores.values(), dtype=np.float64, count=len(treatments)), 2)
+    rounded_scores_pct = np.round(np.fromiter(attribution_scores_pct.values(), dtype=np.float64, count=len(treatments)), 2)
+    scores_values, scores_pct_values = rounded_scores.tolist(), rounded_scores_pct.tolist()
+    attribution_scores_dict = {treatments[i]: scores_values[i] for i in np.argsort(-rounded_scores, kind="stable").tolist()}
+    attribution_scores_pct_dict = {treatments[i]: scores_pct_values[i] for i in np.argsort(-rounded_scores_pct, kind="stable").tolist()}
+
+    # All intervals are stacked into one (causes x 2) array and rounded in a single call
+    causes = list(attribution_scores_intervals)
+    rounded_intervals = np.round(np.stack([attribution_scores_intervals[cause] for cause in causes]), 2) if causes else ()
+    attribution_scores_intervals_dict = dict(zip(causes, rounded_intervals))
+
+    return attribution_scores_dict, attribution_scores_pct_dict, attribution_scores_intervals_dict
+
+def _attribute_anomalies_batch(causal_model, anomalous_node, anomaly_data: pd.DataFrame, n_jobs: int,
+                               num_bootstrap_resamples: int = 20, confidence_level: float = 0.95,
+                               tolerance: float | None = None, batch_size: int = 5) -> list:
+    """
+    Bootstrap the anomaly attribution of all rows of anomaly_data together and return one
+    (medians, intervals) pair of dictionaries per row.
+
+    gcm.confidence_intervals only supports a single anomalous observation, so its procedure is
+    reproduced per row here: one seed per replicate drawn from the global RNG, the geometric
+    median over the replicates as the summary and percentile bounds at the confidence level.
+    Each replicate attributes all rows with a single gcm.attribute_anomalies call.
+
+    With a tolerance, replicates are run batch_size at a time and the bootstrap stops early once
+    no interval width changed by more than that fraction since the previous batch;
+    num_bootstrap_resamples is then the ceiling. Without one, all replicates run in one batch.
+    """
+    if num_bootstrap_resamples < 1:
+        raise ValueError("Number of repetitions should be greater than 0, but got %d" % num_bootstrap_resamples)
+    estimation_func = gcm.bootstrap_sampling(gcm.attribute_anomalies,
+                                             causal_model,
+                                             anomalous_node,
+                                             anomaly_samples=anomaly_data,
+                                             shapley_config=gcm.shapley.ShapleyConfig(n_jobs=1))
+
+    def replicate(random_seed: int) -> dict:
+        # The filter set at import does not reach the joblib (loky) worker processes, so
+        # warnings are suppressed inside each replicate as well
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            gcm.util.general.set_random_seed(random_seed)
+            return estimation_func()
+
+    if tolerance is None:
+        batch_size = num_bootstrap_resamples
+    causes = None
+    replicate_scores = []
+    previous_widths = None
+    # One worker pool is reused for all batches
+    with joblib.Parallel(n_jobs=n_jobs) as parallel:
+        while len(replicate_scores) < num_bootstrap_resamples:
+            size = min(batch_size, num_bootstrap_resamples - len(replicate_scores))
+            random_seeds = np.random.randint(np.iinfo(np.int32).max, size=size)
+            replicates = parallel(joblib.delayed(replicate)(int(random_seed)) for random_seed in random_seeds)
+            if causes is None:
+                causes = list(replicates[0])
+            replicate_scores.extend(np.stack([np.asarray(result[cause], dtype=np.float64).reshape(-1) for cause in causes]) for result in replicates)
+
+            # Scores as a (replicates, causes, rows) array
+            scores = np.stack(replicate_scores)
+            bounds = np.percentile(scores, [(1 - confidence_level) * 100, confidence_level * 100], axis=0)
+            if tolerance is not None:
+                widths = bounds[1] - bounds[0]
+                # Stop once every interval width is stable relative to the previous batch
+                if previous_widths is not None and (np.abs(widths - previous_widths) <= tolerance * np.abs(previous_widths)).all():
+                    break
+                previous_widths = widths
+
+    results = []
+    for row in range(scores.shape[2]):
+        medians = estimate_geometric_median(scores[:, :, row])
+        results.append((
+            {cause: medians[i] for i, cause in enumerate(causes)},
+            {cause: bounds[:, i, row] for i, cause in enumerate(causes)}
+        ))
+    return results
+
 def on_receive(data: dict) -> dict:
     """
     Perform anomaly attribution on a specified node in a causal model using bootstrap-based 
@@ -47,6 +241,13 @@ def on_receive(data: dict) -> dict:
             - "anomalous_node" (str): The node in the graph where the anomaly has been detected.
             - "anomaly_data" (str): JSON-formatted string representing a dictionary of one-row 
                                      observations (with all causal variables as keys and single-element lists as values).
+                                     A pandas DataFrame is also accepted and used without conversion.
+            - "n_jobs" (int, optional): Number of parallel workers for the bootstrap replicates (default -1, all cores).
+            - "bootstrap_tolerance" (float, optional): Stop the bootstrap early once the confidence interval widths
+                                     change by less than this fraction between batches of replicates, e.g. 0.02
+                                     (default None, always run all replicates).
+            - "num_bootstrap_resamples" (int, optional): Number of bootstrap replicates, the ceiling when
+                                     "bootstrap_tolerance" is set (default 20).
 
     Returns:
         dict: A dictionary containing:
@@ -54,7 +255,7 @@ def on_receive(data: dict) -> dict:
             - "status" (str): Either "success" or "error".
             - "message" (str): Descriptive message for result status.
             - "anomalous_node" (str): The node under analysis.
-            - "anomaly_data" (str): The input anomaly observation in JSON format.
+            - "anomaly_data" (str): The input anomaly observation in JSON format (a JSON string input is returned unchanged).
             - "anomaly_attribution" (str or None): JSON-formatted raw attribution scores (median values), sorted.
             - "anomaly_attribution_pct" (str or None): JSON-formatted attribution scores as percentages, sorted.
             - "anomaly_attribution_confidence" (str or None): JSON-formatted 95% confidence intervals per cause.
@@ -69,67 +270,123 @@ def on_receive(data: dict) -> dict:
         ... }
         >>> result = on_receive(data)
     """
-    def convert_to_percentage(value_dictionary: dict) -> dict:
-        total_absolute_sum = np.sum([abs(v) for v in value_dictionary.values()])
-        if total_absolute_sum == 0:
-            # Avoid division by zero
-            return {k: 0 for k in value_dictionary}
-        return {k: abs(v) / total_absolute_sum * 100 for k, v in value_dictionary.items()}
-    
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    # Retrieve input parameters from the data dictionary once; both result branches reuse them
+    model_path = data.get("model_path")
+    anomalous_node = data.get("anomalous_node")
+    anomaly_data_raw = data.get("anomaly_data")
+    n_jobs = data.get("n_jobs", -1)
+    bootstrap_tolerance = data.get("bootstrap_tolerance")
+    num_bootstrap_resamples = data.get("num_bootstrap_resamples", 20)
+    # Echo the anomaly data back as a JSON string, encoded once for both result branches
+    anomaly_data_input = _echo_json(anomaly_data_raw)
 
     try:
-        # Retrieve input parameters from the data dictionary
-        model_path = data.get("model_path")
-        anomalous_node = data.get("anomalous_node")
-        anomaly_data = pd.DataFrame(data=json.loads(data.get("anomaly_data")))
+        anomaly_data = _read_anomaly_data(anomaly_data_raw)
+        if len(anomaly_data) != 1:
+            raise ValueError("anomaly_data must hold exactly one observation, but got %d rows; "
+                             "use on_receive_batch to attribute several observations" % len(anomaly_data))
 
         # Set a fixed random seed for reproducibility
         gcm.util.general.set_random_seed(0)
 
         # Step 1: Load the pre-trained causal model from file
-        with open(model_path, 'rb') as file:
-            causal_model = pickle.load(file)
+        causal_model = _load_model(model_path, os.path.getmtime(model_path))
 
         # Step 2: Causal Query - Anomaly Attribution
-        attribution_scores_median,  attribution_scores_intervals = gcm.confidence_intervals(
-            gcm.bootstrap_sampling(gcm.attribute_anomalies,
-                                   causal_model,
-                                   anomalous_node, 
-                                   anomaly_samples=anomaly_data))
+        # Bootstrap replicates are independent, so they run in parallel; each replicate is seeded
+        # from the global RNG, keeping the result reproducible. The Shapley estimation inside each
+        # replicate is kept single-threaded to avoid oversubscribing the cores. The replicates are
+        # aggregated directly in numpy, with the same seeds, geometric median and percentile bounds
+        # as gcm.confidence_intervals (with a tolerance, in batches until the intervals stabilize).
+        (attribution_scores_median, attribution_scores_intervals), = _attribute_anomalies_batch(
+            causal_model, anomalous_node, anomaly_data, n_jobs,
+            num_bootstrap_resamples=num_bootstrap_resamples, tolerance=bootstrap_tolerance)
         
-        attribution_scores = attribution_scores_median
-        attribution_scores_pct = convert_to_percentage(attribution_scores)
-
-        # --- Prepare Output Dictionary (sorted descending by value) ---
-        attribution_scores_dict = dict(
-            sorted(
-                ((treatment, round(value, 2)) for treatment, value in attribution_scores.items()),
-                key=lambda item: item[1],
-                reverse=True
-            )
-        )
-
-        attribution_scores_pct_dict = dict(
-            sorted(
-                ((treatment, round(value, 2)) for treatment, value in attribution_scores_pct.items()),
-                key=lambda item: item[1],
-                reverse=True
-            )
-        )
-
-        attribution_scores_intervals_dict = dict((treatment, [round(x, 2) for x in value.tolist()]) for treatment, value in attribution_scores_intervals.items())
+        # --- Prepare Output Dictionaries (sorted descending by value) ---
+        attribution_scores_dict, attribution_scores_pct_dict, attribution_scores_intervals_dict = _format_attribution(
+            attribution_scores_median, attribution_scores_intervals)
         
         # Return successful evaluation result
         result = {
             "timestamp": timestamp,
             "status": "success",
             "message": "Successful Calculation of Anomaly Attribution",
-            "anomalous_node": data.get("anomalous_node"),
-            "anomaly_data": json.dumps(data.get("anomaly_data")),
-            "anomaly_attribution": json.dumps(attribution_scores_dict),
-            "anomaly_attribution_pct": json.dumps(attribution_scores_pct_dict),
-            "anomaly_attribution_confidence": json.dumps(attribution_scores_intervals_dict)
+            "anomalous_node": anomalous_node,
+            "anomaly_data": anomaly_data_input,
+            "anomaly_attribution": _dumps(attribution_scores_dict),
+            "anomaly_attribution_pct": _dumps(attribution_scores_pct_dict),
+            "anomaly_attribution_confidence": _dumps(attribution_scores_intervals_dict)
+        }
+
+    except Exception as e:
+        # In case of any exception, return error information
+        result = {
+            "timestamp": timestamp,
+            "status": "error",
+            "message": str(e),
+            "anomalous_node": anomalous_node,
+            "anomaly_data": anomaly_data_input,
+            "anomaly_attribution": None,
+            "anomaly_attribution_pct": None,
+            "anomaly_attribution_confidence": None
+        }
+
+    return result
+
+def on_receive_batch(data: dict) -> dict:
+    """
+    Batched variant of on_receive for several anomalous observations of the same node.
+
+    All rows of "anomaly_data" are attributed together: the model is loaded once and each
+    bootstrap replicate runs a single gcm.attribute_anomalies call over all rows, instead of
+    one full bootstrap per on_receive call. on_receive is kept as is for single observations.
+
+    Args:
+        data (dict): The same keys as on_receive, except that "anomaly_data" may hold any
+            number of rows (a dictionary of equal-length lists, or a DataFrame).
+
+    Returns:
+        dict: The same keys as on_receive, where "anomaly_attribution", "anomaly_attribution_pct"
+            and "anomaly_attribution_confidence" are JSON-formatted lists with one entry per row,
+            in the row order of "anomaly_data".
+    """
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    # Retrieve input parameters from the data dictionary once; both result branches reuse them
+    model_path = data.get("model_path")
+    anomalous_node = data.get("anomalous_node")
+    anomaly_data_raw = data.get("anomaly_data")
+    n_jobs = data.get("n_jobs", -1)
+    bootstrap_tolerance = data.get("bootstrap_tolerance")
+    num_bootstrap_resamples = data.get("num_bootstrap_resamples", 20)
+    # Echo the anomaly data back as a JSON string, encoded once for both result branches
+    anomaly_data_input = _echo_json(anomaly_data_raw)
+
+    try:
+        anomaly_data = _read_anomaly_data(anomaly_data_raw)
+
+        # Set a fixed random seed for reproducibility
+        gcm.util.general.set_random_seed(0)
+
+        # Step 1: Load the pre-trained causal model from file
+        causal_model = _load_model(model_path, os.path.getmtime(model_path))
+
+        # Step 2: Causal Query - Anomaly Attribution for all rows at once
+        formatted = [_format_attribution(medians, intervals)
+                     for medians, intervals in _attribute_anomalies_batch(causal_model, anomalous_node, anomaly_data, n_jobs,
+                                                                          num_bootstrap_resamples=num_bootstrap_resamples,
+                                                                          tolerance=bootstrap_tolerance)]
+
+        # Return successful evaluation result
+        result = {
+            "timestamp": timestamp,
+            "status": "success",
+            "message": "Successful Calculation of Anomaly Attribution",
+            "anomalous_node": anomalous_node,
+            "anomaly_data": anomaly_data_input,
+            "anomaly_attribution": _dumps([row[0] for row in formatted]),
+            "anomaly_attribution_pct": _dumps([row[1] for row in formatted]),
+            "anomaly_attribution_confidence": _dumps([row[2] for row in formatted])
         }
 
     except Exception as e:
@@ -138,8 +395,8 @@ def on_receive(data: dict) -> dict:
             "timestamp": timestamp,
             "status": "error",
             "message": str(e),
-            "anomalous_node": data.get("anomalous_node"),
-            "anomaly_data": json.dumps(data.get("anomaly_data")),
+            "anomalous_node": anomalous_node,
+            "anomaly_data": anomaly_data_input,
             "anomaly_attribution": None,
             "anomaly_attribution_pct": None,
             "anomaly_attribution_confidence": None